@@ -1,14 +1,17 @@
 from __future__ import print_function
 
 import logging
-import Queue
 import serial
 import time
 import threading
 from binascii import hexlify, unhexlify
 from uuid import UUID
 from enum import Enum
-from collections import defaultdict
+from collections import defaultdict, deque
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 from pygatt.exceptions import NotConnectedError
 from pygatt.backends import BLEBackend, Characteristic
@@ -24,17 +27,72 @@ from .util import find_usb_serial_devices
 
 log = logging.getLogger(__name__)
 
+# Python 2 has no monotonic clock in the standard library
+monotonic = getattr(time, 'monotonic', time.time)
+
 BLED112_VENDOR_ID = 0x2458
 BLED112_PRODUCT_ID = 0x0001
 
+# Commands without arguments always pack to the same bytes, so build them once
+GAP_END_PROCEDURE_COMMAND = CommandBuilder.gap_end_procedure()
+SM_GET_BONDS_COMMAND = CommandBuilder.sm_get_bonds()
+
+# (packet type, name of the BGAPIBackend method that handles it)
+PACKET_HANDLERS = (
+    (ResponsePacketType.sm_get_bonds, '_ble_rsp_sm_get_bonds'),
+    (EventPacketType.attclient_attribute_value,
+     '_ble_evt_attclient_attribute_value'),
+    (EventPacketType.attclient_find_information_found,
+     '_ble_evt_attclient_find_information_found'),
+    (EventPacketType.connection_status, '_ble_evt_connection_status'),
+    (EventPacketType.connection_disconnected,
+     '_ble_evt_connection_disconnected'),
+    (EventPacketType.gap_scan_response, '_ble_evt_gap_scan_response'),
+    (EventPacketType.sm_bond_status, '_ble_evt_sm_bond_status'),
+)
+
+CONNECTED_FLAG = constants.connection_status_flag['connected']
 
 UUIDType = Enum('UUIDType', ['custom', 'service', 'attribute',
                              'descriptor', 'characteristic'])
 
+# Map the bytes of each known 16-bit GATT UUID to its UUIDType
+UUID_TYPES = dict(
+    (bytes(uuid), uuid_type)
+    for uuid_type, uuids in (
+        (UUIDType.service, constants.gatt_service_uuid),
+        (UUIDType.attribute, constants.gatt_attribute_type_uuid),
+        (UUIDType.descriptor, constants.gatt_characteristic_descriptor_uuid),
+        (UUIDType.characteristic, constants.gatt_characteristic_type_uuid))
+    for uuid in uuids.values())
+
 
 def bgapi_address_to_hex(address):
-    address = hexlify(bytearray(list(reversed(address)))).upper()
-    return ':'.join(''.join(pair) for pair in zip(*[iter(address)] * 2))
+    address = bytearray(address)[::-1]
+    return ':'.join(['%02X'] * len(address)) % tuple(address)
+
+
+def hex_to_bgapi_address(address):
+    """
+    Convert an address formatted like "01:23:45:67:89:AB" to the raw
+    little-endian bytes BGAPI uses, the inverse of bgapi_address_to_hex.
+    """
+    return bytes(bytearray(unhexlify(address.replace(":", "")))[::-1])
+
+
+def packet_type_masks(packet_types):
+    """
+    Encode a collection of packet types as one bitmask per packet type class,
+    with bit N set if the packet type with value N is in the collection.
+
+    packet_types -- an iterable of ResponsePacketType and EventPacketType.
+
+    Returns a dictionary of {packet type class: bitmask}.
+    """
+    masks = {ResponsePacketType: 0, EventPacketType: 0}
+    for packet_type in packet_types:
+        masks[type(packet_type)] |= 1 << packet_type.value
+    return masks
 
 
 class AdvertisingAndScanInfo(object):
@@ -42,11 +100,17 @@ class AdvertisingAndScanInfo(object):
     Holds the advertising and scan response packet data from a device at a given
     address.
     """
-    def __init__(self):
-        self.name = ""
-        self.address = ""
-        self.rssi = None
-        self.packet_data = {
+    __slots__ = ('name', 'address', 'rssi', 'packet_data')
+
+    def __init__(self, address, name="", rssi=None, packet_data=None):
+        """
+        address -- the raw BGAPI address bytes, as used for the
+            _devices_discovered keys.
+        """
+        self.name = name
+        self.address = address
+        self.rssi = rssi
+        self.packet_data = packet_data or {
             # scan_response_packet_type[xxx]: data_dictionary,
         }
 
@@ -55,13 +119,16 @@ class BGAPIBackend(BLEBackend):
     """
     A BLE backend for a BGAPI compatible USB adapter.
     """
-    def __init__(self, serial_port=None):
+    def __init__(self, serial_port=None, low_latency=True):
         """
         Initialize the backend, but don't start the USB connection yet. Must
         call .start().
 
         serial_port -- The name of the serial port for the BGAPI-compatible
             USB interface. If not provided, will attempt to auto-detect.
+        low_latency -- request the serial driver's low latency mode (Linux
+            only), which disables the receive buffering delay of some USB
+            serial adapters.
         """
         self._lib = bglib.BGLib()
         if serial_port is None:
@@ -74,14 +141,23 @@ class BGAPIBackend(BLEBackend):
             else:
                 raise BGAPIError("Unable to auto-detect BLED112 serial port")
         self._serial_port = serial_port
+        self._low_latency = low_latency
 
         self._ser = None
         self._receiver = None
+        # notifications are passed to devices from this thread, so callbacks
+        # can't hold up the receiver or deadlock by sending a command
+        self._notifier = None
+        self._notification_queue = queue.Queue()
         self._running = None
         self._lock = threading.Lock()
 
-        # buffer for packets received
-        self._receiver_queue = Queue.Queue()
+        # buffer for packets received - only the receiver thread appends and
+        # only expect_any pops, and both operations on a deque are atomic, so
+        # it doesn't need the extra locking of a Queue.Queue
+        self._receiver_queue = deque()
+        # set after each append to _receiver_queue, to wake expect_any
+        self._packet_received = threading.Event()
 
         self._connected_devices = {
             # handle: BLEDevice
@@ -91,25 +167,29 @@ class BGAPIBackend(BLEBackend):
         self._num_bonds = 0  # number of bonds stored on the adapter
         self._stored_bonds = []  # bond handles stored on the adapter
         self._devices_discovered = {
-            # 'address': AdvertisingAndScanInfo,
-            # Note: address formatted like "01:23:45:67:89:AB"
+            # address: AdvertisingAndScanInfo,
+            # Note: address is the raw 6 address bytes as sent by BGAPI, only
+            # formatted like "01:23:45:67:89:AB" when returned from scan()
         }
         self._characteristics = defaultdict(dict)
+        # set by the receiver when one of these addresses is seen in a scan
+        self._scan_stop_addresses = set()
+        self._scan_stop_event = threading.Event()
+        self._characteristics_cache = {
+            # 'address': {uuid: Characteristic}, from the last discovery
+        }
         self._connections = {}
 
         self._current_characteristic = None  # used in char/descriptor discovery
+        # Handlers are indexed by packet type value, one table per packet
+        # class, so dispatching a packet doesn't need to hash the enum member.
         self._packet_handlers = {
-            ResponsePacketType.sm_get_bonds: self._ble_rsp_sm_get_bonds,
-            EventPacketType.attclient_attribute_value: (
-                self._ble_evt_attclient_attribute_value),
-            EventPacketType.attclient_find_information_found: (
-                self._ble_evt_attclient_find_information_found),
-            EventPacketType.connection_status: self._ble_evt_connection_status,
-            EventPacketType.connection_disconnected: (
-                self._ble_evt_connection_disconnected),
-            EventPacketType.gap_scan_response: self._ble_evt_gap_scan_response,
-            EventPacketType.sm_bond_status: self._ble_evt_sm_bond_status,
+            ResponsePacketType: [None] * (len(ResponsePacketType) + 1),
+            EventPacketType: [None] * (len(EventPacketType) + 1),
         }
+        for packet_type, handler_name in PACKET_HANDLERS:
+            self._packet_handlers[type(packet_type)][
+                packet_type.value] = getattr(self, handler_name)
 
         log.info("Initialized new BGAPI backend on %s", serial_port)
 
@@ -121,14 +201,26 @@ class BGAPIBackend(BLEBackend):
         if self._running and self._running.is_set():
             self.stop()
 
+        # Drop anything left over from a previous run, including the stop
+        # sentinel
+        self._receiver_queue.clear()
         self._ser = serial.Serial(self._serial_port, baudrate=256000,
-                                  timeout=0.25)
+                                  timeout=0.25, write_timeout=1)
+        if self._low_latency and hasattr(self._ser, 'set_low_latency_mode'):
+            try:
+                self._ser.set_low_latency_mode(True)
+            except (IOError, ValueError, NotImplementedError) as e:
+                log.debug("Unable to enable serial low latency mode: %s", e)
         self._receiver = threading.Thread(target=self._receive)
         self._receiver.daemon = True
 
+        self._notifier = threading.Thread(target=self._notify)
+        self._notifier.daemon = True
+
         self._running = threading.Event()
         self._running.set()
         self._receiver.start()
+        self._notifier.start()
 
         self.disable_advertising()
 
@@ -138,7 +230,7 @@ class BGAPIBackend(BLEBackend):
 
         # Stop any ongoing procedure
         log.debug("Stopping any outstanding GAP procedure")
-        self.send_command(CommandBuilder.gap_end_procedure())
+        self.send_command(GAP_END_PROCEDURE_COMMAND)
         try:
             self.expect(ResponsePacketType.gap_end_procedure)
         except BGAPIError:
@@ -159,6 +251,14 @@ class BGAPIBackend(BLEBackend):
             self._receiver.join()
         self._receiver = None
 
+        if self._notifier:
+            self._notification_queue.put(None)
+            self._notifier.join()
+        self._notifier = None
+        # Wake up anything still waiting in expect_any
+        self._receiver_queue.append(None)
+        self._packet_received.set()
+
         if self._ser:
             self._ser.close()
             self._ser = None
@@ -197,7 +297,7 @@ class BGAPIBackend(BLEBackend):
         # Find bonds
         log.info("Fetching existing bonds for devices")
         self._stored_bonds = []
-        self.send_command(CommandBuilder.sm_get_bonds())
+        self.send_command(SM_GET_BONDS_COMMAND)
 
         try:
             self.expect(ResponsePacketType.sm_get_bonds)
@@ -207,8 +307,8 @@ class BGAPIBackend(BLEBackend):
         if self._num_bonds == 0:
             return
 
-        while len(self._stored_bonds) < self._num_bonds:
-            self.expect(EventPacketType.sm_bond_status)
+        self.expect(EventPacketType.sm_bond_status,
+                    until=lambda: len(self._stored_bonds) >= self._num_bonds)
 
         for b in reversed(self._stored_bonds):
             log.info("Deleting bond %s", b)
@@ -217,7 +317,8 @@ class BGAPIBackend(BLEBackend):
             self.expect(ResponsePacketType.sm_delete_bonding)
 
     def scan(self, timeout=10, scan_interval=75, scan_window=50, active=True,
-             discover_mode=constants.gap_discover_mode['observation']):
+             discover_mode=constants.gap_discover_mode['observation'],
+             stop_when=None):
         """
         Perform a scan to discover BLE devices.
 
@@ -227,6 +328,9 @@ class BGAPIBackend(BLEBackend):
                      frequency for advertisement packets.
         active -- True --> ask sender for scan response data. False --> don't.
         discover_mode -- one of the gap_discover_mode constants.
+        stop_when -- an optional list of device addresses formatted like
+                     "01:23:45:67:89:AB". The scan ends early as soon as one
+                     of them is discovered.
         """
         parameters = 1 if active else 0
         # NOTE: the documentation seems to say that the times are in units of
@@ -238,22 +342,27 @@ class BGAPIBackend(BLEBackend):
 
         self.expect(ResponsePacketType.gap_set_scan_parameters)
 
+        self._scan_stop_event.clear()
+        self._scan_stop_addresses = set(
+            hex_to_bgapi_address(address) for address in stop_when or [])
+
         log.info("Starting an %s scan", "active" if active else "passive")
         self.send_command(CommandBuilder.gap_discover(discover_mode))
 
         self.expect(ResponsePacketType.gap_discover)
 
         log.info("Pausing for for %ds to allow scan to complete", timeout)
-        time.sleep(timeout)
+        self._scan_stop_event.wait(timeout)
+        self._scan_stop_addresses = set()
 
         log.info("Stopping scan")
-        self.send_command(CommandBuilder.gap_end_procedure())
+        self.send_command(GAP_END_PROCEDURE_COMMAND)
         self.expect(ResponsePacketType.gap_end_procedure)
 
         devices = []
-        for address, info in self._devices_discovered.iteritems():
+        for address, info in self._devices_discovered.items():
             devices.append({
-                'address': address,
+                'address': bgapi_address_to_hex(address),
                 'name': info.name,
                 'rssi': info.rssi
             })
@@ -265,7 +374,7 @@ class BGAPIBackend(BLEBackend):
                 addr_type=constants.ble_address_type[
                     'gap_address_type_public'],
                 interval_min=60, interval_max=76, supervision_timeout=100,
-                latency=0):
+                latency=0, use_cached=False):
         """
         Connnect directly to a device given the ble address then discovers and
         stores the characteristic and characteristic descriptor handles.
@@ -275,13 +384,18 @@ class BGAPIBackend(BLEBackend):
         address -- a bytearray containing the device mac address.
         timeout -- number of seconds to wait before returning if not connected.
         addr_type -- one of the ble_address_type constants.
+        use_cached -- reuse the characteristics discovered during a previous
+            connection to the same address instead of discovering them again.
+            Only safe if the device's attribute handles never change, or if
+            clear_characteristics_cache is called when they do.
 
         Raises BGAPIError or NotConnectedError on failure.
         """
 
         address_bytes = bytearray(unhexlify(address.replace(":", "")))
+        address_hex = bgapi_address_to_hex(address_bytes)
         for device in self._connections.values():
-            if device._address == bgapi_address_to_hex(address_bytes):
+            if device._address == address_hex:
                 return device
 
         log.info("Connecting to device at address %s (timeout %ds)",
@@ -301,23 +415,38 @@ class BGAPIBackend(BLEBackend):
             # TODO i'm finding that when reconnecting to the same MAC, we geta
             # conneciotn status of "disconnected" but that is picked up here as
             # "connected", then we don't get anything else.
-            if self._connection_status_flag(
-                    packet['flags'],
-                    constants.connection_status_flag['connected']):
+            if packet['flags'] & CONNECTED_FLAG:
                 device = BGAPIBLEDevice(bgapi_address_to_hex(packet['address']),
                                         packet['connection_handle'],
-                                        self)
-                if self._connection_status_flag(
-                        packet['flags'],
-                        constants.connection_status_flag['encrypted']):
-                    device.encrypted = True
+                                        self, use_cached=use_cached)
+                device.connection_flags = packet['flags']
                 self._connections[packet['connection_handle']] = device
                 log.info("Connected to %s", address)
                 return device
         except ExpectedResponseTimeout:
             raise NotConnectedError()
 
-    def discover_characteristics(self, connection_handle):
+    def discover_characteristics(self, connection_handle, use_cached=False):
+        """
+        Discover the characteristics and characteristic descriptors of the
+        device on a connection.
+
+        connection_handle -- the handle of the connection to the device.
+        use_cached -- if characteristics were already discovered for the
+            device's address, return those without querying the device.
+
+        Returns a dictionary of Characteristic objects keyed by UUID.
+        """
+        # The handle is unknown if the link has already dropped, in which case
+        # the device is queried anyway so the adapter reports the error
+        device = self._connections.get(connection_handle)
+        address = device._address if device is not None else None
+        if use_cached and address in self._characteristics_cache:
+            log.info("Using cached characteristics for %s", address)
+            self._characteristics[connection_handle] = dict(
+                self._characteristics_cache[address])
+            return self._characteristics[connection_handle]
+
         att_handle_start = 0x0001  # first valid handle
         att_handle_end = 0xFFFF  # last valid handle
         log.info("Fetching characteristics for connection %d",
@@ -331,26 +460,30 @@ class BGAPIBackend(BLEBackend):
                     timeout=10)
 
         for char_uuid_str, char_obj in (
-                self._characteristics[connection_handle].iteritems()):
+                self._characteristics[connection_handle].items()):
             log.info("Characteristic 0x%s is handle 0x%x",
                      char_uuid_str, char_obj.handle)
             for desc_uuid_str, desc_handle in (
-                    char_obj.descriptors.iteritems()):
+                    char_obj.descriptors.items()):
                 log.info("Characteristic descriptor 0x%s is handle 0x%x",
                          desc_uuid_str, desc_handle)
+        if address is not None:
+            self._characteristics_cache[address] = dict(
+                self._characteristics[connection_handle])
         return self._characteristics[connection_handle]
 
-    @staticmethod
-    def _connection_status_flag(flags, flag_to_find):
+    def clear_characteristics_cache(self, address=None):
         """
-        Is the given flag in the connection status flags?
-
-        flags -- the 'flags' parameter returned by ble_evt_connection_status.
-        flag_to_find -- the flag to look for in flags.
+        Forget characteristics cached by discover_characteristics, e.g. after
+        a device reports its services have changed.
 
-        Returns true if flag_to_find is in flags. Returns false otherwise.
+        address -- the address of the device to forget, formatted like
+            "01:23:45:67:89:AB". If None, forget all devices.
         """
-        return (flags & flag_to_find) == flag_to_find
+        if address is None:
+            self._characteristics_cache.clear()
+        else:
+            self._characteristics_cache.pop(address.upper(), None)
 
     @staticmethod
     def _get_uuid_type(uuid):
@@ -364,16 +497,10 @@ class BGAPIBackend(BLEBackend):
         """
         if len(uuid) == 16:  # 128-bit --> 16 byte
             return UUIDType.custom
-        if uuid in constants.gatt_service_uuid.values():
-            return UUIDType.service
-        if uuid in constants.gatt_attribute_type_uuid.values():
-            return UUIDType.attribute
-        if uuid in constants.gatt_characteristic_descriptor_uuid.values():
-            return UUIDType.descriptor
-        if uuid in constants.gatt_characteristic_type_uuid.values():
-            return UUIDType.characteristic
-        log.warn("UUID %s is of unknown type", hexlify(uuid))
-        return None
+        uuid_type = UUID_TYPES.get(bytes(uuid))
+        if uuid_type is None:
+            log.warn("UUID %s is of unknown type", hexlify(uuid))
+        return uuid_type
 
     def _scan_rsp_data(self, data):
         """
@@ -390,92 +517,102 @@ class BGAPIBackend(BLEBackend):
         data_dict = {
             # 'name': value,
         }
-        bytes_left_in_field = 0
-        field_name = None
-        field_value = []
-        # Iterate over data bytes to put in field
+        data = bytearray(data)
         dev_name = ""
-        for b in data:
-            if bytes_left_in_field == 0:
-                # New field
-                bytes_left_in_field = b
-                field_value = []
+        # Step from one length byte to the next, slicing out each field whole
+        i = 0
+        while i < len(data):
+            field_length = data[i]
+            field_end = i + 1 + field_length
+            if field_length == 0:
+                i += 1
+                continue
+            if field_end > len(data):
+                # Truncated field
+                break
+            field_name = constants.scan_response_data_type[data[i + 1]]
+            field_value = data[i + 2:field_end]
+            i = field_end
+            # Field type specific formats
+            if (field_name == 'complete_local_name' or
+                    field_name == 'shortened_local_name'):
+                dev_name = field_value.decode("utf-8")
+                data_dict[field_name] = dev_name
+            elif field_name == 'complete_list_128-bit_service_class_uuids':
+                data_dict[field_name] = []
+                # 16 bytes per UUID
+                for j in range(0, len(field_value) // 16 * 16, 16):
+                    service_uuid = (
+                        "0x%s" % bgapi_address_to_hex(field_value[j:j + 16]))
+                    data_dict[field_name].append(service_uuid)
             else:
-                field_value.append(b)
-                bytes_left_in_field -= 1
-                if bytes_left_in_field == 0:
-                    # End of field
-                    field_name = (
-                        constants.scan_response_data_type[field_value[0]])
-                    field_value = field_value[1:]
-                    # Field type specific formats
-                    if (field_name == 'complete_local_name' or
-                            field_name == 'shortened_local_name'):
-                        dev_name = bytearray(field_value).decode("utf-8")
-                        data_dict[field_name] = dev_name
-                    elif (field_name ==
-                          'complete_list_128-bit_service_class_uuids'):
-                        data_dict[field_name] = []
-                        for i in range(0, len(field_value)/16):  # 16 bytes
-                            service_uuid = (
-                                "0x%s" %
-                                bgapi_address_to_hex(field_value[i*16:i*16+16]))
-                            data_dict[field_name].append(service_uuid)
-                    else:
-                        data_dict[field_name] = bytearray(field_value)
+                data_dict[field_name] = field_value
         return dev_name, data_dict
 
     def expect(self, expected, *args, **kargs):
-        return self.expect_any([expected], *args, **kargs)
+        return self.expect_any((expected,), *args, **kargs)
 
     def expect_any(self, expected_packet_choices, timeout=None,
-                   assert_return_success=True):
+                   assert_return_success=True, until=None):
         """
         Process packets until a packet of one of the expected types is found.
 
-        expected_packet_choices -- a list of BGLib.PacketType.xxxxx. Upon
+        expected_packet_choices -- a sequence of BGLib.PacketType.xxxxx. Upon
                                    processing a packet of a type contained in
                                    the list, this function will return.
         timeout -- maximum time in seconds to process packets.
         assert_return_success -- raise an exception if the return code from a
             matched message is non-zero.
+        until -- an optional function taking no arguments. If given, keep
+            processing packets after each expected packet until it returns
+            True, then return the last expected packet.
 
         Raises an ExpectedResponseTimeout if one of the expected responses is
             not receiving withint the time limit.
         """
         timeout = timeout or 1
-        log.debug("Expecting a response of one of %s within %fs",
-                  expected_packet_choices, timeout or 0)
+        # Checked once per call rather than for every packet processed
+        debug = log.isEnabledFor(logging.DEBUG)
+        if debug:
+            log.debug("Expecting a response of one of %s within %fs",
+                      expected_packet_choices, timeout)
+
+        expected_masks = packet_type_masks(expected_packet_choices)
 
-        start_time = None
-        if timeout is not None:
-            start_time = time.time()
+        deadline = monotonic() + timeout
 
         while True:
-            packet = None
             try:
-                # TODO can we increase the timeout here?
-                packet = self._receiver_queue.get(timeout=0.1)
-            except Queue.Empty:
-                if timeout is not None:
-                    if time.time() - start_time > timeout:
-                        raise ExpectedResponseTimeout(
-                            expected_packet_choices, timeout)
-                    continue
+                packet = self._receiver_queue.popleft()
+            except IndexError:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise ExpectedResponseTimeout(
+                        expected_packet_choices, timeout)
+                # Clear only after waking, then check the queue again: every
+                # packet appended before the clear is already in the queue
+                self._packet_received.wait(remaining)
+                self._packet_received.clear()
+                continue
 
             if packet is None:
+                # The backend was stopped
                 raise ExpectedResponseTimeout(expected_packet_choices, timeout)
 
             packet_type, response = self._lib.decode_packet(packet)
-            return_code = response.get('result', 0)
-            log.debug("Received a %s packet: %s",
-                      packet_type, get_return_message(return_code))
+            if debug:
+                log.debug("Received a %s packet: %s", packet_type,
+                          get_return_message(response.get('result', 0)))
 
-            if packet_type in self._packet_handlers:
-                self._packet_handlers[packet_type](response)
+            packet_class = type(packet_type)
+            packet_value = packet_type.value
+            handler = self._packet_handlers[packet_class][packet_value]
+            if handler is not None:
+                handler(response)
 
-            if packet_type in expected_packet_choices:
-                return packet_type, response
+            if (expected_masks[packet_class] >> packet_value) & 1:
+                if until is None or until():
+                    return packet_type, response
 
     def _receive(self):
         """
@@ -483,20 +620,45 @@ class BGAPIBackend(BLEBackend):
         Stops if the self._running event is not set.
         """
         log.info("Running receiver")
+        parse_bytes = self._lib.parse_bytes
         while self._running.is_set():
-            byte = self._ser.read()
-            if len(byte) > 0:
-                byte = ord(byte)
-                packet = self._lib.parse_byte(byte)
-                if packet is not None:
-                    packet_type, args = self._lib.decode_packet(packet)
-                    if packet_type == EventPacketType.attclient_attribute_value:
-                        device = self._connections[args['connection_handle']]
-                        device.receive_notification(args['atthandle'],
-                                                    bytearray(args['value']))
-                    self._receiver_queue.put(packet)
+            # Drain everything that has already arrived in one read, or block
+            # for the next byte if nothing is waiting
+            data = self._ser.read(max(1, self._ser.in_waiting))
+            packets = parse_bytes(bytearray(data))
+            for packet in packets:
+                packet_type, args = self._lib.decode_packet(packet)
+                if packet_type is EventPacketType.attclient_attribute_value:
+                    device = self._connections.get(args['connection_handle'])
+                    if device is not None:
+                        self._notification_queue.put(
+                            (device, args['atthandle'], args['value']))
+                elif (packet_type is EventPacketType.gap_scan_response and
+                      self._scan_stop_addresses and
+                      bytes(bytearray(args['sender'])) in
+                      self._scan_stop_addresses):
+                    self._scan_stop_event.set()
+                self._receiver_queue.append(packet)
+            if packets:
+                self._packet_received.set()
         log.info("Stopping receiver")
 
+    def _notify(self):
+        """
+        Pass notifications queued by the receiver on to their devices, until a
+        None is queued.
+        """
+        while True:
+            notification = self._notification_queue.get()
+            if notification is None:
+                break
+            device, handle, value = notification
+            try:
+                device.receive_notification(handle, value)
+            except Exception:
+                log.exception("Error in notification callback for handle "
+                              "0x%x", handle)
+
     def _ble_evt_attclient_attribute_value(self, args):
         """
         Handles the event for values of characteristics.
@@ -504,9 +666,10 @@ class BGAPIBackend(BLEBackend):
         args -- dictionary containing the attribute handle ('atthandle'),
         attribute type ('type'), and attribute value ('value')
         """
-        log.debug("attribute handle = %x", args['atthandle'])
-        log.debug("attribute type = %x", args['type'])
-        log.debug("attribute value = 0x%s", hexlify(bytearray(args['value'])))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("attribute handle = %x", args['atthandle'])
+            log.debug("attribute type = %x", args['type'])
+            log.debug("attribute value = 0x%s", hexlify(args['value']))
 
     def _ble_evt_attclient_find_information_found(self, args):
         """
@@ -525,13 +688,12 @@ class BGAPIBackend(BLEBackend):
         args -- dictionary containing the characteristic handle ('chrhandle'),
         and characteristic UUID ('uuid')
         """
-        raw_uuid = bytearray(reversed(args['uuid']))
+        raw_uuid = args['uuid'][::-1]
         uuid_type = self._get_uuid_type(raw_uuid)
         if uuid_type != UUIDType.custom:
-            uuid = uuid16_to_uuid(int(
-                bgapi_address_to_hex(args['uuid']).replace(':', ''), 16))
+            uuid = uuid16_to_uuid(int(hexlify(raw_uuid), 16))
         else:
-            uuid = UUID(hexlify(raw_uuid))
+            uuid = UUID(bytes=bytes(raw_uuid))
 
         # TODO is there a way to get the characteristic from the packet instead
         # of having to track the "current" characteristic?
@@ -539,7 +701,7 @@ class BGAPIBackend(BLEBackend):
                 self._current_characteristic is not None):
             self._current_characteristic.add_descriptor(uuid, args['chrhandle'])
         elif uuid_type == UUIDType.custom:
-            log.info("Found custom characteristic %s" % uuid)
+            log.info("Found custom characteristic %s", uuid)
             new_char = Characteristic(uuid, args['chrhandle'])
             self._current_characteristic = new_char
             self._characteristics[
@@ -562,22 +724,24 @@ class BGAPIBackend(BLEBackend):
             ('bonding')
         """
         connection_handle = args['connection_handle']
-        if not self._connection_status_flag(
-                args['flags'],
-                constants.connection_status_flag['connected']):
+        if not args['flags'] & CONNECTED_FLAG:
             # Disconnected
             self._connections.pop(connection_handle, None)
-
-        log.info("Connection status: handle=0x%x, flags=%s, address=0x%s, "
-                 "connection interval=%fms, timeout=%d, "
-                 "latency=%d intervals, bonding=0x%x",
-                 connection_handle,
-                 args['address'],
-                 hexlify(bytearray(args['address'])),
-                 args['conn_interval'] * 1.25,
-                 args['timeout'] * 10,
-                 args['latency'],
-                 args['bonding'])
+        elif connection_handle in self._connections:
+            self._connections[connection_handle].connection_flags = (
+                args['flags'])
+
+        if log.isEnabledFor(logging.INFO):
+            log.info("Connection status: handle=0x%x, flags=0x%x, "
+                     "address=%s, connection interval=%fms, timeout=%d, "
+                     "latency=%d intervals, bonding=0x%x",
+                     connection_handle,
+                     args['flags'],
+                     bgapi_address_to_hex(args['address']),
+                     args['conn_interval'] * 1.25,
+                     args['timeout'] * 10,
+                     args['latency'],
+                     args['bonding'])
 
     def _ble_evt_gap_scan_response(self, args):
         """
@@ -592,23 +756,25 @@ class BGAPIBackend(BLEBackend):
         """
         # Parse packet
         packet_type = constants.scan_response_packet_type[args['packet_type']]
-        address = bgapi_address_to_hex(args['sender'])
+        address = bytes(bytearray(args['sender']))
         name, data_dict = self._scan_rsp_data(args['data'])
 
         # Store device information
-        if address not in self._devices_discovered:
-            self._devices_discovered[address] = AdvertisingAndScanInfo()
-        dev = self._devices_discovered[address]
-        if dev.name == "":
-            dev.name = name
-        if dev.address == "":
-            dev.address = address
-        if (packet_type not in dev.packet_data or
-                len(dev.packet_data[packet_type]) < len(data_dict)):
-            dev.packet_data[packet_type] = data_dict
-        dev.rssi = args['rssi']
-        log.debug("Received a scan response from %s with rssi=%d dBM "
-                  "and data=%s", address, args['rssi'], data_dict)
+        dev = self._devices_discovered.get(address)
+        if dev is None:
+            self._devices_discovered[address] = AdvertisingAndScanInfo(
+                address, name, args['rssi'], {packet_type: data_dict})
+        else:
+            if dev.name == "":
+                dev.name = name
+            previous_data = dev.packet_data.get(packet_type)
+            if previous_data is None or len(previous_data) < len(data_dict):
+                dev.packet_data[packet_type] = data_dict
+            dev.rssi = args['rssi']
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Received a scan response from %s with rssi=%d dBM "
+                      "and data=%s", bgapi_address_to_hex(args['sender']),
+                      args['rssi'], data_dict)
 
     def _ble_evt_sm_bond_status(self, args):
         """
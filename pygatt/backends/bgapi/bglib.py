@@ -34,7 +34,7 @@ THE SOFTWARE.
 from __future__ import print_function
 
 import logging
-from struct import unpack
+from struct import unpack, unpack_from
 from enum import Enum
 
 log = logging.getLogger(__name__)
@@ -322,13 +322,18 @@ class BGLib(object):
         self._ble_response = 0x00
         self._wifi_event = 0x88
         self._wifi_response = 0x08
+        self._packet_start_bytes = frozenset([
+            self._ble_event, self._ble_response,
+            self._wifi_event, self._wifi_response])
 
     def send_command(self, ser, packet):
         """
-        Send a packet to the BLED12 over serial.
+        Send a packet to the BLED12 over serial. The whole packet, header and
+        payload, is written in a single call so it reaches the adapter as one
+        USB transfer.
 
         ser -- The serial.Serial object to write to.
-        packet -- The packet to write.
+        packet -- The packet to write, as built by BGAPICommandPacketBuilder.
         """
         ser.write(packet)
 
@@ -359,6 +364,41 @@ class BGLib(object):
             return packet
         return None
 
+    def parse_bytes(self, data):
+        """
+        Re-build packets read in from a chunk of bytes over serial. Once a
+        packet's header gives its length, the rest of it is taken from data in
+        one slice rather than byte by byte.
+
+        data -- a bytearray of the bytes read.
+
+        Returns a list of the complete packets found, each a list of its bytes
+        like those returned by parse_byte. A packet left incomplete at the end
+        of data is finished by the next call.
+        """
+        packets = []
+        buffer = self.buffer
+        i = 0
+        while i < len(data):
+            if not buffer:
+                # Skip anything that can't be the start of a packet
+                if data[i] in self._packet_start_bytes:
+                    buffer.append(data[i])
+                i += 1
+                continue
+            if len(buffer) == 1:
+                buffer.append(data[i])
+                i += 1
+                self.expected_length = 4 + (buffer[0] & 0x07) + buffer[1]
+            end = i + self.expected_length - len(buffer)
+            buffer.extend(data[i:end])
+            i = end
+            if len(buffer) == self.expected_length:
+                packets.append(buffer)
+                buffer = []
+        self.buffer = buffer
+        return packets
+
     def _decode_response_packet(self, packet_class, packet_command, payload,
                                 payload_length):
         packet_type = RESPONSE_PACKET_MAPPING.get(
@@ -368,38 +408,38 @@ class BGLib(object):
             return
 
         response = {}
-        if packet_type == ResponsePacketType.system_address_get:
+        if packet_type is ResponsePacketType.system_address_get:
             address = unpack('<6s', payload[:6])[0]
-            address = [ord(b) for b in address]
+            address = list(bytearray(address))
             response = {
                 'address': address
             }
-        elif packet_type == ResponsePacketType.system_reg_read:
+        elif packet_type is ResponsePacketType.system_reg_read:
             address, value =\
                 unpack('<HB', payload[:3])
             response = {
                 'address': address, 'value': value
             }
-        elif packet_type == ResponsePacketType.system_get_counters:
+        elif packet_type is ResponsePacketType.system_get_counters:
             txok, txretry, rxok, rxfail, mbuf =\
                 unpack('<BBBBB', payload[:5])
             response = {
                 'txok': txok, 'txretry': txretry, 'rxok': rxok,
                 'rxfail': rxfail, 'mbuf': mbuf
             }
-        elif packet_type == ResponsePacketType.system_get_connections:
+        elif packet_type is ResponsePacketType.system_get_connections:
             maxconn = unpack('<B', payload[:1])[0]
             response = {
                 'maxconn': maxconn
             }
-        elif packet_type == ResponsePacketType.system_read_memory:
+        elif packet_type is ResponsePacketType.system_read_memory:
             address, data_len =\
                 unpack('<IB', payload[:5])
-            data_data = [ord(b) for b in payload[5:]]
+            data_data = list(bytearray(payload[5:]))
             response = {
                 'address': address, 'data': data_data
             }
-        elif packet_type == ResponsePacketType.system_get_info:
+        elif packet_type is ResponsePacketType.system_get_info:
             data = unpack('<HHHHHBB', payload[:12])
             response = {
                 'major': data[0], 'minor': data[1],
@@ -441,34 +481,34 @@ class BGLib(object):
             response = {
                 'result': result
             }
-        elif packet_type == ResponsePacketType.system_endpoint_rx:
+        elif packet_type is ResponsePacketType.system_endpoint_rx:
             result, data_len =\
                 unpack('<HB', payload[:3])
-            data_data = [ord(b) for b in payload[3:]]
+            data_data = list(bytearray(payload[3:]))
             response = {
                 'result': result, 'data': data_data
             }
-        elif packet_type == ResponsePacketType.flash_ps_load:
+        elif packet_type is ResponsePacketType.flash_ps_load:
             result, value_len = unpack('<HB',
                                        payload[:3])
-            value_data = [ord(b) for b in payload[3:]]
+            value_data = list(bytearray(payload[3:]))
             response = {
                 'result': result, 'value': value_data
             }
-        elif packet_type == ResponsePacketType.attributes_read:
+        elif packet_type is ResponsePacketType.attributes_read:
             handle, offset, result, value_len = unpack(
                 '<HHHB', payload[:7]
             )
-            value_data = [ord(b) for b in payload[7:]]
+            value_data = list(bytearray(payload[7:]))
             response = {
                 'handle': handle, 'offset': offset,
                 'result': result, 'value': value_data
             }
-        elif packet_type == ResponsePacketType.attributes_read_type:
+        elif packet_type is ResponsePacketType.attributes_read_type:
             handle, result, value_len = unpack(
                 '<HHB', payload[:5]
             )
-            value_data = [ord(b) for b in payload[5:]]
+            value_data = list(bytearray(payload[5:]))
             response = {
                 'handle': handle, 'result': result,
                 'value': value_data
@@ -497,44 +537,44 @@ class BGLib(object):
             response = {
                 'connection_handle': connection, 'result': result
             }
-        elif packet_type == ResponsePacketType.connection_get_rssi:
+        elif packet_type is ResponsePacketType.connection_get_rssi:
             connection, rssi = unpack(
                 '<Bb', payload[:2]
             )
             response = {
                 'connection_handle': connection, 'rssi': rssi
             }
-        elif packet_type == ResponsePacketType.connection_channel_map_get:
+        elif packet_type is ResponsePacketType.connection_channel_map_get:
             connection, map_len = unpack(
                 '<BB', payload[:2]
             )
-            map_data = [ord(b) for b in payload[2:]]
+            map_data = list(bytearray(payload[2:]))
             response = {
                 'connection_handle': connection, 'map': map_data
             }
-        elif packet_type == ResponsePacketType.connection_get_status:
+        elif packet_type is ResponsePacketType.connection_get_status:
             connection = unpack('<B', payload[:1])[0]
             response = {
                 'connection_handle': connection
             }
-        elif packet_type == ResponsePacketType.connection_raw_tx:
+        elif packet_type is ResponsePacketType.connection_raw_tx:
             connection = unpack('<B', payload[:1])[0]
             response = {
                 'connection_handle': connection
             }
-        elif packet_type == ResponsePacketType.sm_encrypt_start:
+        elif packet_type is ResponsePacketType.sm_encrypt_start:
             handle, result = unpack(
                 '<BH', payload[:3]
             )
             response = {
                 'handle': handle, 'result': result
             }
-        elif packet_type == ResponsePacketType.sm_get_bonds:
+        elif packet_type is ResponsePacketType.sm_get_bonds:
             bonds = unpack('<B', payload[:1])[0]
             response = {
                 'bonds': bonds
             }
-        elif packet_type == ResponsePacketType.gap_connect_direct:
+        elif packet_type is ResponsePacketType.gap_connect_direct:
             result, connection_handle = unpack(
                 '<HB', payload[:3]
             )
@@ -542,7 +582,7 @@ class BGLib(object):
                 'result': result,
                 'connection_handle': connection_handle
             }
-        elif packet_type == ResponsePacketType.gap_connect_selective:
+        elif packet_type is ResponsePacketType.gap_connect_selective:
             result, connection_handle = unpack(
                 '<HB', payload[:3]
             )
@@ -550,49 +590,49 @@ class BGLib(object):
                 'result': result,
                 'connection_handle': connection_handle
             }
-        elif packet_type == ResponsePacketType.hardware_io_port_read:
+        elif packet_type is ResponsePacketType.hardware_io_port_read:
             result, port, data = unpack(
                 '<HBB', payload[:4]
             )
             response = {
                 'result': result, 'port': port, 'data': data
             }
-        elif packet_type == ResponsePacketType.hardware_spi_transfer:
+        elif packet_type is ResponsePacketType.hardware_spi_transfer:
             result, channel, data_len = unpack(
                 '<HBB', payload[:4]
             )
-            data_data = [ord(b) for b in payload[4:]]
+            data_data = list(bytearray(payload[4:]))
             response = {
                 'result': result, 'channel': channel,
                 'data': data_data
             }
-        elif packet_type == ResponsePacketType.hardware_i2c_read:
+        elif packet_type is ResponsePacketType.hardware_i2c_read:
             result, data_len = unpack(
                 '<HB', payload[:3]
             )
-            data_data = [ord(b) for b in payload[3:]]
+            data_data = list(bytearray(payload[3:]))
             response = {
                 'result': result, 'data': data_data
             }
-        elif packet_type == ResponsePacketType.hardware_i2c_write:
+        elif packet_type is ResponsePacketType.hardware_i2c_write:
             written = unpack('<B', payload[:1])[0]
             response = {
                 'written': written
             }
-        elif packet_type == ResponsePacketType.test_get_channel_map:
+        elif packet_type is ResponsePacketType.test_get_channel_map:
             # channel_map_len = unpack(
             #    '<B', payload[:1]
             # )[0]
             channel_map_data =\
-                [ord(b) for b in payload[1:]]
+                list(bytearray(payload[1:]))
             response = {
                 'channel_map': channel_map_data
             }
-        elif packet_type == ResponsePacketType.test_debug:
+        elif packet_type is ResponsePacketType.test_debug:
             # output_len = unpack('<B',
             #                     payload[:1])[0]
             output_data =\
-                [ord(b) for b in payload[1:]]
+                list(bytearray(payload[1:]))
             response = {
                 'output': output_data
             }
@@ -607,7 +647,7 @@ class BGLib(object):
             return
 
         response = {}
-        if packet_type == EventPacketType.system_boot:
+        if packet_type is EventPacketType.system_boot:
             data = unpack('<HHHHHBB', payload[:12])
             response = {
                 'major': data[0], 'minor': data[1],
@@ -615,9 +655,9 @@ class BGLib(object):
                 'll_version': data[4], 'protocol_version': data[5],
                 'hw': data[6]
             }
-        elif packet_type == EventPacketType.system_debug:
+        elif packet_type is EventPacketType.system_debug:
             data_len = unpack('<B', payload[:1])[0]
-            data_data = [ord(b) for b in payload[1:]]
+            data_data = list(bytearray(payload[1:]))
             response = {
                 'data': data_data
             }
@@ -630,32 +670,32 @@ class BGLib(object):
             response = {
                 'endpoint': endpoint, 'data': data
             }
-        elif packet_type == EventPacketType.system_script_failure:
+        elif packet_type is EventPacketType.system_script_failure:
             address, reason = unpack(
                 '<HH', payload[:4]
             )
             response = {
                 'address': address, 'reason': reason
             }
-        elif packet_type == EventPacketType.flash_ps_key:
+        elif packet_type is EventPacketType.flash_ps_key:
             key, value_len = unpack(
                 '<HB', payload[:3]
             )
-            value_data = [ord(b) for b in payload[3:]]
+            value_data = list(bytearray(payload[3:]))
             response = {
                 'key': key, 'value': value_data
             }
-        elif packet_type == EventPacketType.attributes_value:
+        elif packet_type is EventPacketType.attributes_value:
             connection, reason, handle, offset, value_len = unpack(
                 '<BBHHB', payload[:7]
             )
-            value_data = [ord(b) for b in payload[7:]]
+            value_data = list(bytearray(payload[7:]))
             response = {
                 'connection_handle': connection, 'reason': reason,
                 'handle': handle, 'offset': offset,
                 'value': value_data
             }
-        elif packet_type == EventPacketType.attributes_user_read_request:
+        elif packet_type is EventPacketType.attributes_user_read_request:
             connection, handle, offset, maxsize = unpack(
                 '<BHHB', payload[:6]
             )
@@ -663,21 +703,21 @@ class BGLib(object):
                 'connection_handle': connection, 'handle': handle,
                 'offset': offset, 'maxsize': maxsize
             }
-        elif packet_type == EventPacketType.attributes_status:
+        elif packet_type is EventPacketType.attributes_status:
             handle, flags = unpack('<HB', payload[:3])
             response = {
                 'handle': handle, 'flags': flags
             }
-        elif packet_type == EventPacketType.connection_status:
+        elif packet_type is EventPacketType.connection_status:
             data = unpack('<BB6sBHHHB', payload[:16])
-            address = [ord(b) for b in data[2]]
+            address = list(bytearray(data[2]))
             response = {
                 'connection_handle': data[0], 'flags': data[1],
                 'address': address, 'address_type': data[3],
                 'conn_interval': data[4], 'timeout': data[5],
                 'latency': data[6], 'bonding': data[7]
             }
-        elif packet_type == EventPacketType.connection_version_ind:
+        elif packet_type is EventPacketType.connection_version_ind:
             connection, vers_nr, comp_id, sub_vers_nr = unpack(
                 '<BBHH', payload[:6]
             )
@@ -685,38 +725,38 @@ class BGLib(object):
                 'connection_handle': connection, 'vers_nr': vers_nr,
                 'comp_id': comp_id, 'sub_vers_nr': sub_vers_nr
             }
-        elif packet_type == EventPacketType.connection_feature_ind:
+        elif packet_type is EventPacketType.connection_feature_ind:
             connection, features_len = unpack(
                 '<BB', payload[:2]
             )
             features_data =\
-                [ord(b) for b in payload[2:]]
+                list(bytearray(payload[2:]))
             response = {
                 'connection_handle': connection, 'features': features_data
             }
-        elif packet_type == EventPacketType.connection_raw_rx:
+        elif packet_type is EventPacketType.connection_raw_rx:
             connection, data_len = unpack(
                 '<BB', payload[:2]
             )
-            data_data = [ord(b) for b in payload[2:]]
+            data_data = list(bytearray(payload[2:]))
             response = {
                 'connection_handle': connection, 'data': data_data
             }
-        elif packet_type == EventPacketType.connection_disconnected:
+        elif packet_type is EventPacketType.connection_disconnected:
             connection, reason = unpack(
                 '<BH', payload[:3]
             )
             response = {
                 'connection_handle': connection, 'reason': reason
             }
-        elif packet_type == EventPacketType.attclient_indicated:
+        elif packet_type is EventPacketType.attclient_indicated:
             connection, attrhandle = unpack(
                 '<BH', payload[:3]
             )
             response = {
                 'connection_handle': connection, 'attrhandle': attrhandle
             }
-        elif packet_type == EventPacketType.attclient_procedure_completed:
+        elif packet_type is EventPacketType.attclient_procedure_completed:
             connection, result, chrhandle = unpack(
                 '<BHH', payload[:5]
             )
@@ -724,79 +764,79 @@ class BGLib(object):
                 'connection_handle': connection, 'result': result,
                 'chrhandle': chrhandle
             }
-        elif packet_type == EventPacketType.attclient_group_found:
+        elif packet_type is EventPacketType.attclient_group_found:
             connection, start, end, uuid_len = unpack(
                 '<BHHB', payload[:6]
             )
-            uuid_data = [ord(b) for b in payload[6:]]
+            uuid_data = list(bytearray(payload[6:]))
             response = {
                 'connection_handle': connection, 'start': start,
                 'end': end, 'uuid': uuid_data
             }
-        elif packet_type == EventPacketType.attclient_attribute_found:
+        elif packet_type is EventPacketType.attclient_attribute_found:
             data = unpack('<BHHBB', payload[:7])
-            uuid_data = [ord(b) for b in payload[7:]]
+            uuid_data = list(bytearray(payload[7:]))
             response = {
                 'connection_handle': data[0], 'chrdecl': data[1],
                 'value': data[2], 'properties': data[3],
                 'uuid': uuid_data
             }
-        elif packet_type == EventPacketType.attclient_find_information_found:
+        elif packet_type is EventPacketType.attclient_find_information_found:
             connection, chrhandle, uuid_len = unpack(
                 '<BHB', payload[:4]
             )
-            uuid_data = [ord(b) for b in payload[4:]]
+            uuid_data = bytearray(payload[4:])
             response = {
                 'connection_handle': connection, 'chrhandle': chrhandle,
                 'uuid': uuid_data
             }
-        elif packet_type == EventPacketType.attclient_attribute_value:
-            connection, atthandle, type, value_len = unpack(
-                '<BHBB', payload[:5]
+        elif packet_type is EventPacketType.attclient_attribute_value:
+            connection, atthandle, type, value_len = unpack_from(
+                '<BHBB', payload
             )
-            value_data = [ord(b) for b in payload[5:]]
+            value_data = bytearray(payload[5:])
             response = {
                 'connection_handle': connection, 'atthandle': atthandle,
                 'type': type, 'value': value_data
             }
-        elif packet_type == EventPacketType.attclient_read_multiple_response:
+        elif packet_type is EventPacketType.attclient_read_multiple_response:
             connection, handles_len = unpack(
                 '<BB', payload[:2]
             )
             handles_data =\
-                [ord(b) for b in payload[2:]]
+                list(bytearray(payload[2:]))
             response = {
                 'connection_handle': connection, 'handles': handles_data
             }
-        elif packet_type == EventPacketType.sm_smp_data:
+        elif packet_type is EventPacketType.sm_smp_data:
             handle, packet, data_len = unpack(
                 '<BBB', payload[:3]
             )
-            data_data = [ord(b) for b in payload[3:]]
+            data_data = list(bytearray(payload[3:]))
             response = {
                 'handle': handle, 'packet': packet,
                 'data': data_data
             }
-        elif packet_type == EventPacketType.sm_bonding_fail:
+        elif packet_type is EventPacketType.sm_bonding_fail:
             handle, result = unpack(
                 '<BH', payload[:3]
             )
             response = {
                 'handle': handle, 'result': result
             }
-        elif packet_type == EventPacketType.sm_passkey_display:
+        elif packet_type is EventPacketType.sm_passkey_display:
             handle, passkey = unpack(
                 '<BI', payload[:5]
             )
             response = {
                 'handle': handle, 'passkey': passkey
             }
-        elif packet_type == EventPacketType.sm_passkey_request:
+        elif packet_type is EventPacketType.sm_passkey_request:
             handle = unpack('<B', payload[:1])[0]
             response = {
                 'handle': handle
             }
-        elif packet_type == EventPacketType.sm_bond_status:
+        elif packet_type is EventPacketType.sm_bond_status:
             bond, keysize, mitm, keys = unpack(
                 '<BBBB', payload[:4]
             )
@@ -804,23 +844,23 @@ class BGLib(object):
                 'bond': bond, 'keysize': keysize, 'mitm': mitm,
                 'keys': keys
             }
-        elif packet_type == EventPacketType.gap_scan_response:
+        elif packet_type is EventPacketType.gap_scan_response:
             data = unpack('<bB6sBBB', payload[:11])
-            sender = [ord(b) for b in data[2]]
-            data_data = [ord(b) for b in payload[11:]]
+            sender = list(bytearray(data[2]))
+            data_data = list(bytearray(payload[11:]))
             response = {
                 'rssi': data[0], 'packet_type': data[1],
                 'sender': sender, 'address_type': data[3],
                 'bond': data[4], 'data': data_data
             }
-        elif packet_type == EventPacketType.gap_mode_changed:
+        elif packet_type is EventPacketType.gap_mode_changed:
             discover, connect = unpack(
                 '<BB', payload[:2]
             )
             response = {
                 'discover': discover, 'connect': connect
             }
-        elif packet_type == EventPacketType.hardware_io_port_status:
+        elif packet_type is EventPacketType.hardware_io_port_status:
             timestamp, port, irq, state = unpack(
                 '<IBBB', payload[:7]
             )
@@ -828,12 +868,12 @@ class BGLib(object):
                 'timestamp': timestamp, 'port': port, 'irq': irq,
                 'state': state
             }
-        elif packet_type == EventPacketType.hardware_io_soft_timer:
+        elif packet_type is EventPacketType.hardware_io_soft_timer:
             handle = unpack('<B', payload[:1])[0]
             response = {
                 'handle': handle
             }
-        elif packet_type == EventPacketType.hardware_adc_result:
+        elif packet_type is EventPacketType.hardware_adc_result:
             input, value = unpack('<Bh', payload[:3])
             response = {
                 'input': input, 'value': value
@@ -862,7 +902,7 @@ class BGLib(object):
         packet_id, payload_length, packet_class, packet_command = packet[:4]
         # TODO we are not parsing out the high bits of the payload length from
         # the first byte
-        payload = b''.join(chr(i) for i in packet[4:])
+        payload = bytes(bytearray(packet[4:]))
         message_type = packet_id & 0x88
         if message_type == 0:
             return self._decode_response_packet(
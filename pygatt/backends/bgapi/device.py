@@ -10,6 +10,15 @@ from .bglib import EventPacketType, ResponsePacketType
 
 log = logging.getLogger(__name__)
 
+# The packets that can end a bonding attempt
+BOND_RESULT_PACKETS = (EventPacketType.connection_status,
+                       EventPacketType.sm_bonding_fail)
+# The packets that can end a characteristic read
+READ_RESULT_PACKETS = (EventPacketType.attclient_attribute_value,
+                       EventPacketType.attclient_procedure_completed)
+
+ENCRYPTED_FLAG = constants.connection_status_flag['encrypted']
+
 
 def connection_required(func):
     """Raise an exception if the device is not connected before calling the
@@ -23,11 +32,18 @@ def connection_required(func):
 
 
 class BGAPIBLEDevice(BLEDevice):
-    def __init__(self, address, handle, backend):
+    def __init__(self, address, handle, backend, use_cached=False):
         super(BGAPIBLEDevice, self).__init__(address)
         self._handle = handle
         self._backend = backend
+        self._use_cached = use_cached
         self._characteristics = {}
+        # the connection_status_flag bits from the latest connection status
+        self.connection_flags = 0
+
+    @property
+    def encrypted(self):
+        return bool(self.connection_flags & ENCRYPTED_FLAG)
 
     @connection_required
     def bond(self, permanent=False):
@@ -45,8 +61,7 @@ class BGAPIBLEDevice(BLEDevice):
         self._backend.expect(ResponsePacketType.sm_encrypt_start)
 
         packet_type, response = self._backend.expect_any(
-            [EventPacketType.connection_status,
-             EventPacketType.sm_bonding_fail])
+            BOND_RESULT_PACKETS)
         if packet_type == EventPacketType.sm_bonding_fail:
             raise BGAPIError("Bonding failed")
         log.info("Bonded to %s", self._address)
@@ -81,14 +96,14 @@ class BGAPIBLEDevice(BLEDevice):
 
         self._backend.expect(ResponsePacketType.attclient_read_by_handle)
         matched_packet_type, response = self._backend.expect_any(
-            [EventPacketType.attclient_attribute_value,
-             EventPacketType.attclient_procedure_completed])
+            READ_RESULT_PACKETS)
         # TODO why not just expect *only* the attribute value response, then it
         # would time out and raise an exception if allwe got was the 'procedure
         # completed' response?
         if matched_packet_type != EventPacketType.attclient_attribute_value:
             raise BGAPIError("Unable to read characteristic")
-        return bytearray(response['value'])
+        # Each decoded packet has its own value bytearray, no need to copy it
+        return response['value']
 
     @connection_required
     def char_write_handle(self, char_handle, value, wait_for_response=False):
@@ -96,10 +111,9 @@ class BGAPIBLEDevice(BLEDevice):
             raise NotImplementedError()
 
         while True:
-            value_list = [b for b in value]
             self._backend.send_command(
                 CommandBuilder.attclient_attribute_write(
-                    self._handle, char_handle, value_list))
+                    self._handle, char_handle, value))
 
             self._backend.expect(ResponsePacketType.attclient_attribute_write)
             packet_type, response = self._backend.expect(
@@ -121,4 +135,5 @@ class BGAPIBLEDevice(BLEDevice):
 
     @connection_required
     def discover_characteristics(self):
-        return self._backend.discover_characteristics(self._handle)
+        return self._backend.discover_characteristics(
+            self._handle, use_cached=self._use_cached)
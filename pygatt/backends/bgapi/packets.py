@@ -41,16 +41,16 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def system_endpoint_tx(endpoint, data):
         return pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 0, 9,
-                    endpoint, len(data), b''.join(chr(i) for i in data))
+                    endpoint, len(data), bytes(bytearray(data)))
 
     @staticmethod
     def system_whitelist_append(address, address_type):
-        return pack('<4B6sB', 0, 7, 0, 10, b''.join(chr(i) for i in address),
+        return pack('<4B6sB', 0, 7, 0, 10, bytes(bytearray(address)),
                     address_type)
 
     @staticmethod
     def system_whitelist_remove(address, address_type):
-        return pack('<4B6sB', 0, 7, 0, 11, b''.join(chr(i) for i in address),
+        return pack('<4B6sB', 0, 7, 0, 11, bytes(bytearray(address)),
                     address_type)
 
     @staticmethod
@@ -80,7 +80,7 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def flash_ps_save(key, value):
         return pack('<4BHB' + str(len(value)) + 's', 0, 3 + len(value), 1, 3,
-                    key, len(value), b''.join(chr(i) for i in value))
+                    key, len(value), bytes(bytearray(value)))
 
     @staticmethod
     def flash_ps_load(key):
@@ -97,12 +97,12 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def flash_write_words(address, words):
         return pack('<4BHB' + str(len(words)) + 's', 0, 3 + len(words), 1, 7,
-                    address, len(words), b''.join(chr(i) for i in words))
+                    address, len(words), bytes(bytearray(words)))
 
     @staticmethod
     def attributes_write(handle, offset, value):
         return pack('<4BHBB' + str(len(value)) + 's', 0, 4 + len(value), 2, 0,
-                    handle, offset, len(value), b''.join(chr(i) for i in value))
+                    handle, offset, len(value), bytes(bytearray(value)))
 
     @staticmethod
     def attributes_read(handle, offset):
@@ -116,7 +116,7 @@ class BGAPICommandPacketBuilder(object):
     def attributes_user_read_response(connection, att_error, value):
         return pack('<4BBBB' + str(len(value)) + 's', 0, 3 + len(value), 2, 3,
                     connection, att_error, len(value),
-                    b''.join(chr(i) for i in value))
+                    bytes(bytearray(value)))
 
     @staticmethod
     def attributes_user_write_response(connection, att_error):
@@ -147,7 +147,7 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def connection_channel_map_set(connection, map):
         return pack('<4BBB' + str(len(map)) + 's', 0, 2 + len(map), 3, 5,
-                    connection, len(map), b''.join(chr(i) for i in map))
+                    connection, len(map), bytes(bytearray(map)))
 
     @staticmethod
     def connection_features_get(connection):
@@ -160,19 +160,19 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def connection_raw_tx(connection, data):
         return pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 3, 8,
-                    connection, len(data), b''.join(chr(i) for i in data))
+                    connection, len(data), bytes(bytearray(data)))
 
     @staticmethod
     def attclient_find_by_type_value(connection, start, end, uuid, value):
         return pack('<4BBHHHB' + str(len(value)) + 's', 0, 8 + len(value), 4, 0,
                     connection, start, end, uuid, len(value),
-                    b''.join(chr(i) for i in value))
+                    bytes(bytearray(value)))
 
     @staticmethod
     def attclient_read_by_group_type(connection, start, end, uuid):
         return pack('<4BBHHB' + str(len(uuid)) + 's', 0, 6 + len(uuid), 4, 1,
                     connection, start, end, len(uuid),
-                    b''.join(chr(i) for i in uuid))
+                    bytes(bytearray(uuid)))
 
     @staticmethod
     def attclient_read_by_type(connection, start, end, uuid=[0x03, 0x28]):
@@ -180,7 +180,7 @@ class BGAPICommandPacketBuilder(object):
         # querying for characteristics faster.
         return pack('<4BBHHB' + str(len(uuid)) + 's', 0, 6 + len(uuid), 4, 2,
                     connection, start, end, len(uuid),
-                    b''.join(chr(i) for i in uuid))
+                    bytes(bytearray(uuid)))
 
     @staticmethod
     def attclient_find_information(connection, start, end):
@@ -194,13 +194,13 @@ class BGAPICommandPacketBuilder(object):
     def attclient_attribute_write(connection, atthandle, data):
         return pack('<4BBHB' + str(len(data)) + 's', 0, 4 + len(data), 4, 5,
                     connection, atthandle, len(data),
-                    b''.join(chr(i) for i in data))
+                    bytes(bytearray(data)))
 
     @staticmethod
     def attclient_write_command(connection, atthandle, data):
         return pack('<4BBHB' + str(len(data)) + 's', 0, 4 + len(data), 4, 6,
                     connection, atthandle, len(data),
-                    b''.join(chr(i) for i in data))
+                    bytes(bytearray(data)))
 
     @staticmethod
     def attclient_indicate_confirm(connection):
@@ -214,7 +214,7 @@ class BGAPICommandPacketBuilder(object):
     def attclient_prepare_write(connection, atthandle, offset, data):
         return pack('<4BBHHB' + str(len(data)) + 's', 0, 6 + len(data), 4, 9,
                     connection, atthandle, offset, len(data),
-                    b''.join(chr(i) for i in data))
+                    bytes(bytearray(data)))
 
     @staticmethod
     def attclient_execute_write(connection, commit):
@@ -224,7 +224,7 @@ class BGAPICommandPacketBuilder(object):
     def attclient_read_multiple(connection, handles):
         return pack('<4BBB' + str(len(handles)) + 's', 0, 2 + len(handles), 4,
                     11, connection, len(handles),
-                    b''.join(chr(i) for i in handles))
+                    bytes(bytearray(handles)))
 
     @staticmethod
     def sm_encrypt_start(handle, bonding):
@@ -253,7 +253,7 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def sm_set_oob_data(oob):
         return pack('<4BB' + str(len(oob)) + 's', 0, 1 + len(oob), 5, 6,
-                    len(oob), b''.join(chr(i) for i in oob))
+                    len(oob), bytes(bytearray(oob)))
 
     @staticmethod
     def gap_set_privacy_flags(peripheral_privacy, central_privacy):
@@ -271,7 +271,7 @@ class BGAPICommandPacketBuilder(object):
     def gap_connect_direct(address, addr_type, conn_interval_min,
                            conn_interval_max, timeout, latency):
         return pack('<4B6sBHHHH', 0, 15, 6, 3,
-                    b''.join(reversed([chr(i) for i in address])), addr_type,
+                    bytes(bytearray(reversed(address))), addr_type,
                     conn_interval_min, conn_interval_max, timeout, latency)
 
     @staticmethod
@@ -303,11 +303,11 @@ class BGAPICommandPacketBuilder(object):
     def gap_set_adv_data(set_scanrsp, adv_data):
         return pack('<4BBB' + str(len(adv_data)) + 's', 0, 2 + len(adv_data), 6,
                     9, set_scanrsp, len(adv_data),
-                    b''.join(chr(i) for i in adv_data))
+                    bytes(bytearray(adv_data)))
 
     @staticmethod
     def gap_set_directed_connectable_mode(address, addr_type):
-        return pack('<4B6sB', 0, 7, 6, 10, b''.join(chr(i) for i in address),
+        return pack('<4B6sB', 0, 7, 6, 10, bytes(bytearray(address)),
                     addr_type)
 
     @staticmethod
@@ -352,7 +352,7 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def hardware_spi_transfer(channel, data):
         return pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 7, 9,
-                    channel, len(data), b''.join(chr(i) for i in data))
+                    channel, len(data), bytes(bytearray(data)))
 
     @staticmethod
     def hardware_i2c_read(address, stop, length):
@@ -361,7 +361,7 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def hardware_i2c_write(address, stop, data):
         return pack('<4BBBB' + str(len(data)) + 's', 0, 3 + len(data), 7, 11,
-                    address, stop, len(data), b''.join(chr(i) for i in data))
+                    address, stop, len(data), bytes(bytearray(data)))
 
     @staticmethod
     def hardware_set_txpower(power):
@@ -395,4 +395,4 @@ class BGAPICommandPacketBuilder(object):
     @staticmethod
     def test_debug(input):
         return pack('<4BB' + str(len(input)) + 's', 0, 1 + len(input), 8, 5,
-                    len(input), b''.join(chr(i) for i in input))
+                    len(input), bytes(bytearray(input)))
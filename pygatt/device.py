@@ -2,7 +2,6 @@ from __future__ import print_function
 
 import threading
 import logging
-from collections import defaultdict
 from binascii import hexlify
 from uuid import UUID
 
@@ -10,6 +9,11 @@ from . import exceptions
 
 log = logging.getLogger(__name__)
 
+# Characteristic client configuration values that enable notifications or
+# indications
+NOTIFICATION_CONFIG = (0x1, 0x0)
+INDICATION_CONFIG = (0x2, 0x0)
+
 
 class BLEDevice(object):
     """
@@ -25,7 +29,12 @@ class BLEDevice(object):
         """
         self._address = address
         self._characteristics = {}
-        self._callbacks = defaultdict(set)
+        # Replaced, never mutated, when a callback is added so notifications
+        # can be dispatched without taking the lock. Callbacks may run on a
+        # backend thread other than the caller's.
+        self._callbacks = {
+            # handle: frozenset of callbacks
+        }
         self._subscribed_handlers = {}
         self._lock = threading.Lock()
 
@@ -118,14 +127,15 @@ class BLEDevice(object):
         # to be able to get the value or characteristic config handle.
         characteristic_config_handle = value_handle + 1
 
-        properties = bytearray([
-            0x2 if indication else 0x1,
-            0x0
-        ])
+        properties = bytearray(
+            INDICATION_CONFIG if indication else NOTIFICATION_CONFIG)
 
         with self._lock:
             if callback is not None:
-                self._callbacks[value_handle].add(callback)
+                callbacks = dict(self._callbacks)
+                callbacks[value_handle] = callbacks.get(
+                    value_handle, frozenset()).union([callback])
+                self._callbacks = callbacks
 
             if self._subscribed_handlers.get(value_handle, None) != properties:
                 self.char_write_handle(
@@ -160,7 +170,7 @@ class BLEDevice(object):
 
         # TODO support filtering by descriptor UUID, or maybe return the whole
         # Characteristic object
-        log.debug("Found %s" % characteristic)
+        log.debug("Found %s", characteristic)
         return characteristic.handle
 
     def receive_notification(self, handle, value):
@@ -169,9 +179,8 @@ class BLEDevice(object):
         to all registered callbacks.
         """
 
-        log.info('Received notification on handle=0x%x, value=0x%s',
-                 handle, hexlify(value))
-        with self._lock:
-            if handle in self._callbacks:
-                for callback in self._callbacks[handle]:
-                    callback(handle, value)
+        if log.isEnabledFor(logging.INFO):
+            log.info('Received notification on handle=0x%x, value=0x%s',
+                     handle, hexlify(value))
+        for callback in self._callbacks.get(handle, ()):
+            callback(handle, value)
@@ -33,7 +33,7 @@ setup(
     long_description=open('README.mkd').read(),
     url='https://github.com/ampledata/pygatt',
     install_requires=[
-        'pyserial',
+        'pyserial>=3.0',
         'enum34'
     ],
     extras_require={
@@ -136,12 +136,18 @@ class MockBGAPISerialDevice(object):
                 BGAPIPacketBuilder.sm_delete_bonding(0x0000))
 
     def stage_scan_packets(self, scan_responses=[]):
+        self.stage_scan_start_packets()
+        self.stage_scan_response_packets(scan_responses)
+
+    def stage_scan_start_packets(self):
         # Stage ble_rsp_gap_set_scan_parameters (success)
         self.mocked_serial.stage_output(
             BGAPIPacketBuilder.gap_set_scan_parameters(0x0000))
         # Stage ble_rsp_gap_discover (success)
         self.mocked_serial.stage_output(
             BGAPIPacketBuilder.gap_discover(0x0000))
+
+    def stage_scan_response_packets(self, scan_responses):
         for srp in scan_responses:
             # Stage ble_evt_gap_scan_response
             self.mocked_serial.stage_output(
@@ -167,7 +173,7 @@ class MockBGAPISerialDevice(object):
             self.mocked_serial.stage_output(
                 BGAPIPacketBuilder.attclient_find_information_found(
                     connection_handle, handle,
-                    (u+list(reversed([ord(b) for b in uuid])))))
+                    (u+list(reversed(bytearray(uuid))))))
         # Stage ble_evt_attclient_procedure_completed (success)
         self.mocked_serial.stage_output(
             BGAPIPacketBuilder.attclient_procedure_completed(
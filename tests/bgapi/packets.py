@@ -78,7 +78,7 @@ class BGAPIPacketBuilder(object):
         assert((len(value) > 0) and (value[0] == len(value)))
         return pack('<4BBHB' + str(len(value)) + 's', 0x80, 4 + len(value),
                     0x04, 0x05, connection_handle, att_handle, att_type,
-                    b''.join(chr(i) for i in value))
+                    bytes(bytearray(value)))
 
     @staticmethod
     def attclient_find_information_found(connection_handle, chr_handle, uuid):
@@ -86,7 +86,7 @@ class BGAPIPacketBuilder(object):
         assert((len(uuid) > 0) and (uuid[0] == len(uuid)))
         return pack('<4BBH' + str(len(uuid)) + 's', 0x80, 3 + len(uuid), 0x04,
                     0x04, connection_handle, chr_handle,
-                    b''.join(chr(i) for i in uuid))
+                    bytes(bytearray(uuid)))
 
     @staticmethod
     def attclient_procedure_completed(
@@ -115,7 +115,7 @@ class BGAPIPacketBuilder(object):
         return pack('<4Bb9B' + str(len(data)) + 's', 0x80, 10 + len(data),
                     0x06, 0x00, rssi, packet_type, bd_addr[5], bd_addr[4],
                     bd_addr[3], bd_addr[2], bd_addr[1], bd_addr[0], addr_type,
-                    bond, b''.join(chr(i) for i in data))
+                    bond, bytes(bytearray(data)))
 
     @staticmethod
     def sm_bond_status(bond_handle, keysize, mitm, keys):
@@ -1,13 +1,18 @@
 from __future__ import print_function
 
 from nose.tools import eq_, ok_
+import threading
+import time
 import unittest
+from mock import MagicMock
 
 from pygatt.backends import BGAPIBackend
+from pygatt.backends.bgapi.bglib import BGLib
 from pygatt.backends.bgapi.util import extract_vid_pid
 from pygatt.backends.bgapi.error_codes import get_return_message
 
 from .mocker import MockBGAPISerialDevice
+from .packets import BGAPIPacketBuilder
 
 
 class BGAPIBackendTests(unittest.TestCase):
@@ -43,6 +48,16 @@ class BGAPIBackendTests(unittest.TestCase):
         another_device = self.backend.connect(self.address_string)
         eq_(device, another_device)
 
+    def test_start_low_latency_not_supported(self):
+        # pyserial raises this on POSIX platforms other than Linux
+        set_low_latency_mode = MagicMock(side_effect=NotImplementedError(
+            "Low latency not supported on this platform"))
+        self.mock_device.mocked_serial.set_low_latency_mode = (
+            set_low_latency_mode)
+        self.mock_device.stage_run_packets()
+        self.backend.start()
+        set_low_latency_mode.assert_called_once_with(True)
+
     def test_scan_and_get_devices_discovered(self):
         # Test scan
         scan_responses = []
@@ -58,9 +73,37 @@ class BGAPIBackendTests(unittest.TestCase):
         })
         self.mock_device.stage_scan_packets(scan_responses=scan_responses)
         devs = self.backend.scan(timeout=.5)
+        eq_('01:23:45:67:89:AB', devs[0]['address'])
         eq_('Hello!', devs[0]['name'])
         eq_(-80, devs[0]['rssi'])
 
+    def test_scan_stop_when_address_discovered(self):
+        scan_responses = [{
+            'rssi': -80,
+            'packet_type': 0,
+            'bd_addr': self.address,
+            'addr_type': 0x00,
+            'bond': 0xFF,
+            'data': [0x07, 0x09, ord('H'), ord('e'), ord('l'),
+                     ord('l'), ord('o'), ord('!')]
+        }]
+        # The responses must not arrive until the scan has started
+        self.mock_device.stage_scan_start_packets()
+        threading.Timer(0.5, self.mock_device.stage_scan_response_packets,
+                        [scan_responses]).start()
+        start_time = time.time()
+        devs = self.backend.scan(timeout=10,
+                                 stop_when=[self.address_string])
+        ok_(time.time() - start_time < 5)
+        eq_('Hello!', devs[0]['name'])
+
+    def test_scan_response_128_bit_service_uuids(self):
+        uuids = list(range(0x10, 0x30))
+        _, data = self.backend._scan_rsp_data([len(uuids) + 1, 0x07] + uuids)
+        eq_(["0x" + ":".join("%02X" % b for b in reversed(uuids[:16])),
+             "0x" + ":".join("%02X" % b for b in reversed(uuids[16:]))],
+            data['complete_list_128-bit_service_class_uuids'])
+
     def test_clear_bonds(self):
         # Test delete stored bonds
         self.mock_device.stage_clear_bonds_packets(
@@ -100,3 +143,15 @@ class ReturnCodeTests(unittest.TestCase):
 
     def test_unrecognized_return_code(self):
         ok_(get_return_message(123123123123123) is not None)
+
+
+class BGLibTests(unittest.TestCase):
+
+    def test_parse_bytes_packets_split_across_reads(self):
+        first = bytearray(BGAPIPacketBuilder.gap_set_mode(0))
+        second = bytearray(BGAPIPacketBuilder.gap_end_procedure(0))
+        data = bytearray([0xFF]) + first + second
+        lib = BGLib()
+        eq_([], lib.parse_bytes(data[:2]))
+        eq_([list(first)], lib.parse_bytes(data[2:8]))
+        eq_([list(second)], lib.parse_bytes(data[8:]))
@@ -1,13 +1,18 @@
 from __future__ import print_function
 
-from nose.tools import eq_
+from mock import MagicMock
+from nose.tools import assert_raises, eq_, ok_
+import time
 import unittest
 from uuid import UUID
 
 from pygatt.util import uuid16_to_uuid
 from pygatt.backends import BGAPIBackend
+from pygatt.backends.bgapi.bglib import EventPacketType
+from pygatt.backends.bgapi.exceptions import BGAPIError
 
 from .mocker import MockBGAPISerialDevice
+from .packets import BGAPIPacketBuilder
 
 
 class BGAPIDeviceTests(unittest.TestCase):
@@ -76,6 +81,18 @@ class BGAPIDeviceTests(unittest.TestCase):
         self.mock_device.stage_bond_packets(
             self.address, ['connected', 'encrypted', 'parameters_change'])
         device.bond()
+        ok_(device.encrypted)
+
+    def test_receive_notification(self):
+        device = self._connect()
+        device.receive_notification = MagicMock()
+        self.mock_device.stage_indication_packets(0x1234, [[0xBE, 0xEF]])
+        for i in range(0, 20):
+            if device.receive_notification.called:
+                break
+            time.sleep(0.05)
+        device.receive_notification.assert_called_once_with(
+            0x1234, bytearray([0xBE, 0xEF]))
 
     def test_get_rssi(self):
         device = self._connect()
@@ -83,6 +100,13 @@ class BGAPIDeviceTests(unittest.TestCase):
         self.mock_device.stage_get_rssi_packets()
         eq_(-80, device.get_rssi())
 
+    def test_get_rssi_retries_invalid_value(self):
+        device = self._connect()
+        # The adapter sometimes reports 25, which is retried
+        self.mock_device.stage_get_rssi_packets(rssi=25)
+        self.mock_device.stage_get_rssi_packets(rssi=-70)
+        eq_(-70, device.get_rssi())
+
     def test_discover_characteristics(self):
         device = self._connect()
 
@@ -98,3 +122,42 @@ class BGAPIDeviceTests(unittest.TestCase):
         eq_(characteristics[uuid_char].handle, handle_char)
         eq_(characteristics[uuid_char].descriptors[uuid16_to_uuid(0x2902)],
             handle_desc)
+
+    def _connect_cached(self):
+        self.mock_device.stage_connect_packets(
+            self.address, ['connected', 'completed'])
+        return self.backend.connect(self.address_string, use_cached=True)
+
+    def test_discover_characteristics_cached(self):
+        device = self._connect_cached()
+
+        uuid_char = UUID('01234567-0123-0123-0123-0123456789AB')
+        handle_char = 0x1234
+
+        self.mock_device.stage_discover_characteristics_packets([
+            str(uuid_char), handle_char])
+        device.discover_characteristics()
+
+        self.mock_device.stage_disconnect_packets(True, False)
+        device.disconnect()
+        self.backend.expect(EventPacketType.connection_disconnected)
+        device = self._connect_cached()
+
+        # Nothing is staged, so this would time out if it hit the device
+        characteristics = device.discover_characteristics()
+        eq_(characteristics[uuid_char].handle, handle_char)
+
+        # Once cleared, the device is queried again
+        self.backend.clear_characteristics_cache(device._address)
+        self.mock_device.stage_discover_characteristics_packets([
+            str(uuid_char), 0x4321])
+        characteristics = device.discover_characteristics()
+        eq_(characteristics[uuid_char].handle, 0x4321)
+
+    def test_discover_characteristics_after_connection_dropped(self):
+        device = self._connect_cached()
+        # The adapter reports the link dropped without being asked
+        self.mock_device.mocked_serial.stage_output(
+            BGAPIPacketBuilder.connection_disconnected(0x00, 0x0000))
+        self.backend.expect(EventPacketType.connection_disconnected)
+        assert_raises(BGAPIError, device.discover_characteristics)
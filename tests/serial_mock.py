@@ -1,4 +1,7 @@
-import Queue
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 
 class SerialMock(object):
@@ -9,9 +12,9 @@ class SerialMock(object):
         self._isOpen = True
         self._port = port
         self._timeout = timeout
-        self._output_queue = Queue.Queue()
+        self._output_queue = queue.Queue()
         self._active_packet = None
-        self._expected_input_queue = Queue.Queue()
+        self._expected_input_queue = queue.Queue()
 
     def open(self):
         self._isOpen = True
@@ -22,19 +25,25 @@ class SerialMock(object):
     def write(self, input_data):
         pass
 
-    def read(self):
+    @property
+    def in_waiting(self):
+        if self._active_packet is None:
+            return 0
+        return len(self._active_packet)
+
+    def read(self, size=1):
         if self._active_packet is None:
             try:
                 self._active_packet = self._output_queue.get_nowait()
-            except Queue.Empty:
+            except queue.Empty:
                 # When no bytes to read, serial.read() returns empty byte string
                 return b''
-        read_byte = self._active_packet[0]
-        if len(self._active_packet) == 1:  # we read the last byte
+        read_bytes = self._active_packet[:size]
+        if len(self._active_packet) <= size:  # we read the last byte
             self._active_packet = None
         else:
-            self._active_packet = self._active_packet[1:]
-        return read_byte
+            self._active_packet = self._active_packet[size:]
+        return read_bytes
 
     def stage_output(self, next_output):
         self._output_queue.put(next_output)